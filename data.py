@@ -17,23 +17,19 @@ def get_alpha(lower=False):
 # Return new list with random weights, remove redundancies
 # Ex: C->D and D->C, remove D-C
 def add_weights(r):
-    # Copy routes so that OG list is not changes
-    l = [x[:] for x in r]
+    # Unordered pairs already added (as sorted tuples), for O(1) duplicate checks
+    seen = set()
     weighted = []
-    # Remove duplicate edges
-    for i in range(len(l)):
-        dup = False
-        for d in weighted:
-            # If pair already appears in weighted list, dup=T.
-            if l[i][0] in d and l[i][1] in d:
-                dup = True
-        if not dup:
-            # If not, add
-            weighted.append(l[i])
-    # Add random weights to route list
-    for i in range(len(weighted)):
-        random.seed(i)
-        weighted[i].append(random.randint(1, 999))
+    # Single seeded generator, deterministic without reseeding global random
+    rng = random.Random(0)
+    for edge in r:
+        # Order-independent pair key, cheaper to build and hash than a frozenset
+        a, b = edge[0], edge[1]
+        key = (a, b) if a <= b else (b, a)
+        if key not in seen:
+            seen.add(key)
+            # Copy edge so that OG list is not changed, add random weight
+            weighted.append(edge[:] + [rng.randint(1, 999)])
     return weighted
 
 ##################
@@ -72,5 +68,6 @@ weighted_routes = add_weights(routes)
 # Alphabetical Paths Data
 # A-Z Vertices
 alpha_v = get_alpha()
-# Random Edges (50 )
-alpha_e = add_weights([random.sample(alpha_v, 2) for x in range(50)])
+# Random Edges (50), one seeded generator so the graph is reproducible
+alpha_rng = random.Random(42)
+alpha_e = add_weights([alpha_rng.sample(alpha_v, 2) for x in range(50)])
@@ -1,15 +1,42 @@
 # Directed Graph Data Structures
 # Node:		Directional vertex object
-# 			Recursive Depth First Search method
+# 			Iterative Depth First Search method
 #           connects i/o paths
 # DiGraph:	Directed graph object
-# 			Recursive Kosaraju Algorithm method
+# 			Iterative Kosaraju Algorithm method
 #           assigns Strongly Connected Component representatives
+import logging
+from array import array
 from collections import defaultdict, deque
+from itertools import chain
+
+# Optional: SciPy's compiled strong-components for large graphs
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    csr_matrix = connected_components = None
+# Optional: Numba-compiled Kosaraju over CSR arrays
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = njit = None
+
+logger = logging.getLogger(__name__)
+
+# Below this many Nodes, kosaraju_scc_numba() uses the pure-Python path
+NUMBA_MIN_NODES = 1000
 
 
 # Directional vertex object with expanded adjacency lists
 class Node:
+    # Count of adjacency changes made through add_i/add_o on any Node
+    # DiGraph compares it against the count its cached CSR was built at,
+    # so edges added directly on Nodes are picked up too
+    # (editing prev/next in place bypasses it, use the adders)
+    edits = 0
+
     def __init__(self, name: str):
         # ID:			"AAA"
         # Adjacency Lists:
@@ -18,9 +45,12 @@ class Node:
         # access_to:	 	all Nodes accessible via fwd path
         # accessible_from:	all Nodes weakly connected to self via back path
         # scc_rep:			Node representing this Node's strongly connected group
+        # _prev_set/_next_set:	mirror prev/next for O(1) membership
         self.ID = name
         self.prev = []
         self.next = []
+        self._prev_set = set()
+        self._next_set = set()
         self.access_to = []
         self.accessible_from = []
         self.visited = False
@@ -34,11 +64,18 @@ class Node:
         return self.ID
 
     # Adders for in/out neighbors
-    # Takes a Node, adds
+    # Takes a Node, adds if not already a neighbor
+    # Lists stay the iteration order, sets only deduplicate
     def add_i(self, n):
-        self.prev.append(n)
+        if n not in self._prev_set:
+            self._prev_set.add(n)
+            self.prev.append(n)
+            Node.edits += 1
     def add_o(self, n):
-        self.next.append(n)
+        if n not in self._next_set:
+            self._next_set.add(n)
+            self.next.append(n)
+            Node.edits += 1
 
     # Getters for in/out neighbors
     # if no neighbors, returns empty list (evaluates to false)
@@ -48,32 +85,39 @@ class Node:
         return self.prev
     def out_neighbors(self):
         return self.next
+    # All neighbors, in then out, chained without building a merged list
     def io_neighbors(self):
-        return (self.in_neighbors + self.out_neighbors)
+        return chain(self.prev, self.next)
+    def io_degree(self):
+        return len(self.prev) + len(self.next)
 
-    # dfs_fwd():	Recursively connect all accessible out-neighbors
-    # dfs_back():	Recursively connect all accessible in-neighbors
+    # _dfs():		Iteratively connect all Nodes reachable through next_attr
+    # 				Explicit stack of neighbor iterators, so depth is not bound
+    # 				by the recursion limit and discovery order matches recursion
+    # 				seen set gives O(1) membership, coll keeps discovery order
     # expand():		Wrapper for dual-DFS, defines root as self.
     # 				Calls DFS fwd and back, appends access_to adjacency list
-    def expand(self):
-        def dfs_fwd(u):
-            for v in u.next:
-                if v not in self.access_to:
-                    self.access_to.append(v)
-                    print(f"Parsing... {self} -> {v}")
-                    dfs_fwd(v)
-
-        def dfs_back(u):
-            for v in u.prev:
-                if v not in self.accessible_from:
-                    self.accessible_from.append(v)
-                    print(f"Parsing... {self} <- {v}")
-                    dfs_back(v)
+    def _dfs(self, next_attr, coll, arrow):
+        debug = logger.isEnabledFor(logging.DEBUG)
+        seen = set()
+        stack = [iter(getattr(self, next_attr))]
+        while stack:
+            for v in stack[-1]:
+                if v not in seen:
+                    seen.add(v)
+                    coll.append(v)
+                    if debug:
+                        logger.debug("Parsing... %s %s %s", self, arrow, v)
+                    stack.append(iter(getattr(v, next_attr)))
+                    break
+            else:
+                stack.pop()
 
+    def expand(self):
         # Clear exising paths and visit all neighbors
         self.vreset(clear=True)
-        dfs_fwd(self)
-        dfs_back(self)
+        self._dfs('next', self.access_to, '->')
+        self._dfs('prev', self.accessible_from, '<-')
 
     # Reset marker attributes (visited, scc_rep)
     # clear=True:	Also clear access_to and accessible_from lists
@@ -86,7 +130,7 @@ class Node:
 
     # Test if there is an edge self->y
     def is_adj(self, y):
-        return (y in self.next)
+        return (y in self._next_set)
 
 
 # Directed Graph base class
@@ -96,6 +140,18 @@ class DiGraph:
     def __init__(self, vertex_list=None, edge_list=None):
         # {'ID': Node}
         self.Graph = {}
+        # Nodes in insertion order, and {Node: position} in it
+        # Kept per graph, so a Node can belong to several graphs
+        self._nodes_by_idx = []
+        self._idx_of = {}
+        # Forward/transposed CSR, built on demand and dropped when Nodes/edges change
+        self._csr_cache = None
+        self._transpose_cache = None
+        # Integer component label per Node index, and the rep Node per label
+        self._scc_labels = None
+        self._scc_reps = None
+        # Node.edits when the caches above were last valid
+        self._csr_edits = Node.edits
 
         # If Nodes/edges provided, add
         if vertex_list:
@@ -105,7 +161,7 @@ class DiGraph:
 
     # Check if an ID (or Node) exists in Graph
     def is_node(self, name: str):
-        return (str(name) in self.Graph.keys())
+        return (str(name) in self.Graph)
 
     # Takes a Node and adds to Graph
     def add_vertex(self, v):
@@ -114,6 +170,9 @@ class DiGraph:
 
         if _good:
             self.Graph[v.ID] = v
+            self._idx_of[v] = len(self._nodes_by_idx)
+            self._nodes_by_idx.append(v)
+            self._invalidate_csr()
         else: print("Couldn't add vertex...")
 
     # Takes an edge [start, end] and adds to Nodes
@@ -124,6 +183,7 @@ class DiGraph:
         if _good:
             self.Graph[e[0]].add_o(self.Graph[e[1]])
             self.Graph[e[1]].add_i(self.Graph[e[0]])
+            self._invalidate_csr()
         else: print ("Couldn't add edge...")
 
     # Takes a list of Nodes and adds to Graph
@@ -132,14 +192,101 @@ class DiGraph:
             self.add_vertex(vertex)
 
     # Takes a list of [str, str] and adds Node edges
+    # One pass: look up both Nodes directly, report invalid edges once at the end
     def add_edges(self, edges):
-        for edge in edges:
-            self.add_edge(edge)
+        graph = self.Graph
+        bad = 0
+        for e in edges:
+            if isinstance(e, list) and e[0] in graph and e[1] in graph:
+                start, end = graph[e[0]], graph[e[1]]
+                start.add_o(end)
+                end.add_i(start)
+            else:
+                bad += 1
+        self._invalidate_csr()
+        if bad:
+            print(f"Couldn't add {bad} edge(s)...")
 
-    # Perform DFS fwd/back on each Node in Graph, adding paths
+    # Fill access_to/accessible_from of every Node in Graph, adding paths
     def expand_Nodes(self):
-        for v in self.Graph.values():
-            v.expand()
+        self.reachability()
+
+    # Reachability of every Node via the SCC condensation
+    # Members of a component share the same paths, so each edge is read once
+    # rather than once per source Node (as with Node.expand on every Node)
+    # Sets of components are Python ints used as bitsets (bit c = component c)
+    def reachability(self):
+        nodes = self._nodes_by_idx
+        indptr, indices, _ = self.to_csr()
+        indptr_T, _, _ = self.to_csr(transpose=True)
+        # A shared Node can have edges in another graph, which the CSR leaves out
+        # Paths through them still count, so follow them Node by Node instead
+        # (expand() clears scc_rep, so components are labeled afterwards)
+        for i, v in enumerate(nodes):
+            if len(v.next) != indptr[i + 1] - indptr[i] or len(v.prev) != indptr_T[i + 1] - indptr_T[i]:
+                for v in nodes:
+                    v.expand()
+                self.kosaraju_algo()
+                return
+
+        self.kosaraju_algo()
+
+        # labels:	Node index -> component number
+        # members:	component number -> [MemberNodes]
+        labels = self._scc_labels
+        n = len(self._scc_reps)
+        members = [[] for _ in range(n)]
+        for v, c in zip(nodes, labels):
+            members[c].append(v)
+
+        # Condensation DAG, from the CSR rows
+        # own[c]:	bit c if component c reaches itself (size > 1 or self-loop)
+        succ = [set() for _ in range(n)]
+        pred = [set() for _ in range(n)]
+        own = [0] * n
+        for i, c in enumerate(labels):
+            for w in indices[indptr[i]:indptr[i + 1]]:
+                d = labels[w]
+                if c == d:
+                    own[c] = 1 << c
+                else:
+                    succ[c].add(d)
+                    pred[d].add(c)
+
+        # Topological order of components (Kahn)
+        in_deg = [len(p) for p in pred]
+        order = [c for c in range(n) if not in_deg[c]]
+        for c in order:
+            for d in succ[c]:
+                in_deg[d] -= 1
+                if not in_deg[d]:
+                    order.append(d)
+
+        # Union reachable components, successors before predecessors
+        fwd = own[:]
+        for c in reversed(order):
+            for d in succ[c]:
+                fwd[c] |= (1 << d) | fwd[d]
+        back = own[:]
+        for c in order:
+            for d in pred[c]:
+                back[c] |= (1 << d) | back[d]
+
+        # Decode bitsets back to Node lists
+        def decode(bits):
+            nodes = []
+            while bits:
+                low = bits & -bits
+                nodes.extend(members[low.bit_length() - 1])
+                bits ^= low
+            return nodes
+
+        for c in range(n):
+            access_to = decode(fwd[c])
+            accessible_from = decode(back[c])
+            for v in members[c]:
+                v.access_to = access_to[:]
+                v.accessible_from = accessible_from[:]
 
     def reset_Nodes(self):
         for v in self.Graph.values():
@@ -148,53 +295,232 @@ class DiGraph:
     def get_SCCs(self):
         # Get a dict of SCCs
         # {scc_rep: [MemberNodes]}
-        strong_components = defaultdict(list)
-        for v in self.Graph.values():
-            strong_components[v.scc_rep].append(v)
-        return strong_components
+        labels = self._scc_labels
+        if labels is None:
+            # No labels for the current Nodes/edges, group by scc_rep
+            strong_components = defaultdict(list)
+            for v in self.Graph.values():
+                strong_components[v.scc_rep].append(v)
+            return strong_components
+
+        # One pass to size each bucket, one to fill it, no list resizes
+        reps = self._scc_reps
+        counts = [0] * len(reps)
+        for label in labels:
+            counts[label] += 1
+        buckets = [[None] * c for c in counts]
+        pos = [0] * len(reps)
+        for v, label in zip(self._nodes_by_idx, labels):
+            buckets[label][pos[label]] = v
+            pos[label] += 1
+        return {reps[label]: buckets[label] for label in range(len(reps))}
 
     # Kosaraju's algorithm to determine Strongly Connected Components
     # Ascribes each Node a representative Node denoting membership in Component
     # rep is an arbitrary member of the Components
     def kosaraju_algo(self):
+        # Works on integer Node indices over the CSR arrays,
+        # labels map back to Nodes through _nodes_by_idx at the end
         # Visit all out
-        def visit(v):
-            # If v already visited, do nothing
-            if v.visited:
+        # Explicit stack of (index, out-neighbor iterator) pairs
+        def visit(root):
+            # If root already visited, do nothing
+            if visited[root]:
                 return
-            # Otherwise, visit v and successors of v
-            v.visited = True
-            print(f"Visiting {v}")
-            for w in v.next:
-                print(f"{v} -> {w}")
-                visit(w)
-            # Depth reached, add v to tree
-            tree.appendleft(v)
+            # Otherwise, visit root and successors of root
+            visited[root] = 1
+            if debug:
+                logger.debug("Visiting %s", nodes[root])
+            stack = [(root, iter(indices[indptr[root]:indptr[root + 1]]))]
+            while stack:
+                v, it = stack[-1]
+                for w in it:
+                    if debug:
+                        logger.debug("%s -> %s", nodes[v], nodes[w])
+                    if not visited[w]:
+                        visited[w] = 1
+                        if debug:
+                            logger.debug("Visiting %s", nodes[w])
+                        stack.append((w, iter(indices[indptr[w]:indptr[w + 1]])))
+                        break
+                else:
+                    # Depth reached, add v to tree
+                    stack.pop()
+                    tree.appendleft(v)
 
         # Visit all in
-        def assign(v, root):
-            if v.scc_rep:
-                return
-            v.scc_rep = root
-            print(f"Assigning {v} to {root}")
-            for w in v.prev:
-                assign(w, root)
+        def assign(root, label):
+            if labels[root] != -1:
+                return False
+            labels[root] = label
+            stack = [root]
+            while stack:
+                v = stack.pop()
+                if debug:
+                    logger.debug("Assigning %s to %s", nodes[v], nodes[root])
+                for w in indices_T[indptr_T[v]:indptr_T[v + 1]]:
+                    if labels[w] == -1:
+                        labels[w] = label
+                        stack.append(w)
+            return True
+
+        # Trim: a Node with no in- or no out-edges left is a Component of one
+        # Label it and drop it, which can expose more such Nodes
+        # Trimmed Nodes are marked visited, so neither DFS pass enters them
+        def trim():
+            out_deg = array('i', [b - a for a, b in zip(indptr, indptr[1:])])
+            in_deg = array('i', [b - a for a, b in zip(indptr_T, indptr_T[1:])])
+            queue = [v for v in range(n) if not in_deg[v] or not out_deg[v]]
+            for v in queue:
+                visited[v] = 1
+            label = 0
+            for v in queue:
+                if debug:
+                    logger.debug("Trimming %s", nodes[v])
+                labels[v] = label
+                label += 1
+                for w in indices[indptr[v]:indptr[v + 1]]:
+                    if not visited[w]:
+                        in_deg[w] -= 1
+                        if not in_deg[w]:
+                            visited[w] = 1
+                            queue.append(w)
+                for u in indices_T[indptr_T[v]:indptr_T[v + 1]]:
+                    if not visited[u]:
+                        out_deg[u] -= 1
+                        if not out_deg[u]:
+                            visited[u] = 1
+                            queue.append(u)
+            return label
 
         # Implementation
-        self.reset_Nodes()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        nodes = self._nodes_by_idx
+        n = len(nodes)
+        indptr, indices, _ = self.to_csr()
+        indptr_T, indices_T, _ = self._ensure_transpose()
+        # Flat per-index state, not attributes on each Node
+        visited = bytearray(n)
+        labels = array('i', [-1]) * n
         tree = deque()
+        # Label trivial Components first
+        n_labels = trim()
         # Visit nodes, prepend
-        for v in self.Graph.values():
+        for v in range(n):
             visit(v)
-        # Assign nodes to a rep, opposite order of visited
+        # Label nodes, opposite order of visited
         for v in tree:
-            assign(v, v)
+            if assign(v, n_labels):
+                n_labels += 1
+        self._assign_labels(labels)
         # Return a dict(list) of Srongly Connected Components
         return self.get_SCCs()
 
+    # Compressed sparse row (CSR) form of the adjacency lists
+    # id_to_idx:	{'ID': row}, rows follow Graph order
+    # indptr:		row i's out-neighbors are indices[indptr[i]:indptr[i+1]]
+    # 				both array('i'): 4 bytes per entry, no int objects stored,
+    # 				and NumPy can view them without copying
+    # transpose=True:	rows hold in-neighbors instead (cached, see below)
+    # Both forms are memoized until add_vertex/add_edge, or until any Node's
+    # add_i/add_o changes adjacency
+    def to_csr(self, transpose=False):
+        if transpose:
+            return self._ensure_transpose()
+        self._check_stale()
+        if self._csr_cache is None:
+            idx_of = self._idx_of
+            id_to_idx = {v.ID: i for v, i in idx_of.items()}
+            indptr = array('i', [0])
+            indices = array('i')
+            # Neighbors outside this graph (a shared Node's edges elsewhere) are skipped
+            for v in self._nodes_by_idx:
+                indices.extend([idx_of[w] for w in v.next if w in idx_of])
+                indptr.append(len(indices))
+            self._csr_cache = (indptr, indices, id_to_idx)
+        return self._csr_cache
+
+    def _invalidate_csr(self):
+        self._csr_cache = None
+        self._transpose_cache = None
+        self._scc_labels = None
+        self._scc_reps = None
+
+    # Drop the caches if any Node's adjacency changed since they were built
+    def _check_stale(self):
+        if self._csr_edits != Node.edits:
+            self._invalidate_csr()
+            self._csr_edits = Node.edits
+
+    # Transposed CSR
+    # Built from the forward CSR: count in-degrees, then scatter each edge
+    def _ensure_transpose(self):
+        self._check_stale()
+        if self._transpose_cache is None:
+            indptr, indices, id_to_idx = self.to_csr()
+            n = len(id_to_idx)
+            indptr_T = array('i', [0]) * (n + 1)
+            for w in indices:
+                indptr_T[w + 1] += 1
+            for i in range(n):
+                indptr_T[i + 1] += indptr_T[i]
+            # pos[w]:	next free slot in row w
+            pos = indptr_T[:-1]
+            indices_T = array('i', [0]) * len(indices)
+            for v in range(n):
+                for e in range(indptr[v], indptr[v + 1]):
+                    w = indices[e]
+                    indices_T[pos[w]] = v
+                    pos[w] += 1
+            self._transpose_cache = (indptr_T, indices_T, id_to_idx)
+        return self._transpose_cache
+
+    # Give every Node the first Node seen with its label as scc_rep
+    # Labels are renumbered 0, 1, ... in that same first-seen order
+    def _assign_labels(self, labels):
+        renumber = {}
+        reps = []
+        scc_labels = []
+        for v, label in zip(self._nodes_by_idx, labels):
+            if label not in renumber:
+                renumber[label] = len(reps)
+                reps.append(v)
+            scc_labels.append(renumber[label])
+            v.scc_rep = reps[renumber[label]]
+        self._scc_labels = scc_labels
+        self._scc_reps = reps
+
+    # Strongly Connected Components via SciPy (compiled, non-recursive)
+    # Same result as kosaraju_algo, falls back to it if SciPy is unavailable
+    def kosaraju_scc_fast(self):
+        if connected_components is None or not self.Graph:
+            return self.kosaraju_algo()
+        indptr, indices, id_to_idx = self.to_csr()
+        n = len(id_to_idx)
+        adj = csr_matrix(([1] * len(indices), indices, indptr), shape=(n, n))
+        _, labels = connected_components(adj, directed=True, connection='strong')
+        self._assign_labels(labels)
+        return self.get_SCCs()
+
+    # Strongly Connected Components via the Numba kernel below
+    # Small graphs (or no Numba) use kosaraju_algo, skipping array conversion
+    def kosaraju_scc_numba(self):
+        if njit is None or len(self.Graph) < NUMBA_MIN_NODES:
+            return self.kosaraju_algo()
+        indptr, indices, id_to_idx = self.to_csr()
+        indptr_T, indices_T, _ = self.to_csr(transpose=True)
+        labels = _kosaraju_csr(
+            np.asarray(indptr, dtype=np.int32), np.asarray(indices, dtype=np.int32),
+            np.asarray(indptr_T, dtype=np.int32), np.asarray(indices_T, dtype=np.int32),
+            len(id_to_idx))
+        self._assign_labels(labels)
+        return self.get_SCCs()
+
     # Print a generic info screen
+    # Sort IDs only, never falls back to comparing Nodes
     def show_nodes(self):
-        for name, node in sorted(self.Graph.items()):
+        for name in sorted(self.Graph):
+            node = self.Graph[name]
             print(f'''
 ID: {name}
 Connects from: {node.prev}
@@ -202,3 +528,67 @@ Connects to: {node.next}
 Access to: {node.access_to}
 Accessible from: {node.accessible_from}
 Group: {node.scc_rep}''')
+
+
+# Kosaraju's algorithm on CSR arrays (see DiGraph.to_csr)
+# Iterative, with preallocated int32 stacks, so Numba can compile it
+# Returns labels[row] = component number
+def _kosaraju_csr(indptr, indices, indptr_T, indices_T, n):
+    visited = np.zeros(n, dtype=np.uint8)
+    order = np.empty(n, dtype=np.int32)
+    stack = np.empty(n, dtype=np.int32)
+    # edge_pos[k]:	next edge to scan for the Node at stack[k]
+    edge_pos = np.empty(n, dtype=np.int32)
+    n_order = 0
+
+    # Visit all out, record finish order
+    for root in range(n):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        top = 0
+        stack[0] = root
+        edge_pos[0] = indptr[root]
+        while top >= 0:
+            v = stack[top]
+            e = edge_pos[top]
+            if e < indptr[v + 1]:
+                edge_pos[top] = e + 1
+                w = indices[e]
+                if not visited[w]:
+                    visited[w] = 1
+                    top += 1
+                    stack[top] = w
+                    edge_pos[top] = indptr[w]
+            else:
+                order[n_order] = v
+                n_order += 1
+                top -= 1
+
+    # Visit all in, reverse finish order
+    labels = np.full(n, -1, dtype=np.int32)
+    n_labels = 0
+    for k in range(n - 1, -1, -1):
+        root = order[k]
+        if labels[root] != -1:
+            continue
+        labels[root] = n_labels
+        top = 0
+        stack[0] = root
+        while top >= 0:
+            v = stack[top]
+            top -= 1
+            for e in range(indptr_T[v], indptr_T[v + 1]):
+                w = indices_T[e]
+                if labels[w] == -1:
+                    labels[w] = n_labels
+                    top += 1
+                    stack[top] = w
+        n_labels += 1
+    return labels
+
+
+# Compile eagerly for the int32 CSR signature, cached on disk between runs
+if njit is not None:
+    _kosaraju_csr = njit(
+        "int32[:](int32[:], int32[:], int32[:], int32[:], int64)", cache=True)(_kosaraju_csr)
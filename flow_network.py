@@ -4,14 +4,24 @@
 # maxflow = largest possible flow from source-> sink
 # Transportation Problem (Monge–Kantorovich transportation problem)
 # cheapest/most efficient distrubution of resources to meet demand
-from directed_graph import Node, DiGraph
+from array import array
+from collections import deque
+
+from directed_graph import Node, DiGraph, NUMBA_MIN_NODES
 from undirected_graph import Edge
 
+# Optional: Numba-compiled augmenting paths over flat arrays
+try:
+	import numpy as np
+	from numba import njit
+except ImportError:
+	np = njit = None
+
 
 # Flow Object
 # Represents a total outward flow, determined by total inward flow
 # inflow = sum of all outflows of all in-neighbors
-# sum([fn.flow for fn in self.in_neighbors()]
+# sum(fn.outflow for fn in self.in_neighbors())
 # outflow = inflow
 class Flow(Node):
 	def __init__(self, name: str, i=0, o=0):
@@ -19,10 +29,10 @@ class Flow(Node):
 		self.inflow = i
 		self.outflow = o
 
-	def set_inflow():
-		self.inflow = sum([fn.outflow for fn in self.prev])
+	def set_inflow(self):
+		self.inflow = sum(fn.outflow for fn in self.prev)
 
-	def set_outflow():
+	def set_outflow(self):
 		self.outflow = self.inflow
 
 	# source if inflow=0, outflow>0
@@ -38,11 +48,44 @@ class Flow(Node):
 # Represents total outflow from one FlowNode to another
 # capacity denotes total possible flow from x->y
 # flow represents current flow x->
+# Once added to a Network, capacity and flow are views onto its arc arrays
+# (slot idx), before that they are held on the Arc itself
 class Arc(Edge):
 	def __init__(self, start, end, cap=1, flow=0):
-		super().__init__()
-		self.capacity = cap
-		self.flow = flow
+		# Edge weight is the capacity
+		super().__init__(start, end, cap)
+		self._net = None
+		self.idx = None
+		self._capacity = cap
+		self._flow = flow
+
+	@property
+	def capacity(self):
+		if self._net is None:
+			return self._capacity
+		return self._net._cap[self.idx]
+
+	# A new capacity also invalidates the Network's compiled arrays
+	@capacity.setter
+	def capacity(self, c):
+		if self._net is None:
+			self._capacity = c
+		else:
+			self._net._cap[self.idx] = c
+			self._net._csr_dirty = True
+
+	@property
+	def flow(self):
+		if self._net is None:
+			return self._flow
+		return self._net._flow[self.idx]
+
+	@flow.setter
+	def flow(self, f):
+		if self._net is None:
+			self._flow = f
+		else:
+			self._net._flow[self.idx] = f
 
 	# Residual Capacity = capacity - flow
 	@property
@@ -51,8 +94,314 @@ class Arc(Edge):
 
 
 # DiGraph Object
-# P\ush-relabel algorithm considers 
+# Every edge is an Arc, arcs maps (start, end) IDs to it
+# Arc values are stored column-wise, one slot per (start, end), so max_flow
+# works on flat lists indexed by slot instead of Arc attributes
+# max_flow:	Dinic's algorithm, BFS level graph + blocking flow per phase
 class Network(DiGraph):
-	# add_edge Will have a super() in Network child class that accepts weights
 	def __init__(self, v_list=None, e_list=None):
-		super().__init__(vlist, elist)
+		# arcs:		{('start', 'end'): Arc}
+		self.arcs = {}
+		# Arc storage, parallel by slot:
+		# _cap/_flow:	capacity and current flow of each arc (int or float as given)
+		# _src/_dst:	Node index at the start and end of each arc
+		# _arc_idx:		{('start', 'end'): slot}
+		self._cap = []
+		self._flow = []
+		self._src = array('i')
+		self._dst = array('i')
+		self._arc_idx = {}
+		# Adjacency derived from arcs, kept until an arc or Flow is added:
+		# _csr:		compiled forward-star arrays + flow array (see _compile),
+		# 			capacities are copied in, so assigning Arc.capacity marks it dirty
+		# _out_adj/_in_adj:	residual adjacency for the pure-Python path
+		self._csr = None
+		self._csr_dirty = True
+		self._out_adj = self._in_adj = None
+		# max_flow working buffers, sized to the Network on first use and then
+		# reused across phases and calls: BFS levels, BFS queue, current-arc
+		# positions, plus the fill values used to reset them in place
+		self._level = []
+		self._bfs_queue = deque()
+		self._it = []
+		self._unset = []
+		self._zeros = []
+		super().__init__(v_list, e_list)
+
+	# Takes a Flow and adds to Graph, every Network Node tracks in/outflow
+	def add_vertex(self, v):
+		if isinstance(v, Flow):
+			super().add_vertex(v)
+			self._csr_dirty = True
+			self._out_adj = None
+		else: print("Couldn't add vertex...")
+
+	# Takes an Arc, adds it to arcs and its values to the arc arrays
+	# An Arc with the same (start, end) as an existing one takes over its slot,
+	# the replaced Arc keeps a copy of its last capacity and flow
+	# An Arc already viewing another Network's slot is refused
+	def add_arc(self, a):
+		_good = isinstance(a, Arc) and a._net in (None, self) and self.is_node(a.start) and self.is_node(a.end)
+
+		if _good:
+			# Endpoints may be IDs or Flow objects, arcs and Graph are keyed by ID
+			start, end = str(a.start), str(a.end)
+			key = (start, end)
+			cap, flow = a.capacity, a.flow
+			k = self._arc_idx.get(key)
+			if k is None:
+				k = self._arc_idx[key] = len(self._cap)
+				self._cap.append(cap)
+				self._flow.append(flow)
+				self._src.append(self._idx_of[self.Graph[start]])
+				self._dst.append(self._idx_of[self.Graph[end]])
+			else:
+				old = self.arcs[key]
+				old._capacity, old._flow = old.capacity, old.flow
+				old._net = old.idx = None
+				self._cap[k], self._flow[k] = cap, flow
+			self.arcs[key] = a
+			a._net, a.idx = self, k
+			super().add_edge([start, end])
+			self._csr_dirty = True
+			self._out_adj = None
+		else: print("Couldn't add arc...")
+
+	# Takes an Arc or [start, end, (cap)] and adds it as an Arc
+	def add_edge(self, e):
+		if isinstance(e, list):
+			e = Arc(*e)
+		self.add_arc(e)
+
+	# Takes a list of Arcs or [start, end, (cap)]
+	def add_edges(self, edges):
+		for edge in edges:
+			self.add_edge(edge)
+
+	# Maximum flow from source to sink (IDs), Dinic's algorithm
+	# Each phase labels Nodes by BFS distance over residual arcs, then pushes
+	# flow only along level + 1 steps until blocked: O(V^2 * E)
+	# Sets each Arc.flow and Flow in/outflow, returns the total flow
+	def max_flow(self, source, sink):
+		if not (self.is_node(source) and self.is_node(sink)):
+			print("No corresponding source/sink...")
+			return
+
+		# Reset flows
+		self._flow[:] = [0] * len(self._flow)
+		for node in self._nodes_by_idx:
+			node.inflow = node.outflow = 0
+
+		total = 0
+		if source == sink:
+			return total
+		# Large networks run the compiled kernel when Numba is available
+		if njit is not None and len(self.Graph) >= NUMBA_MIN_NODES:
+			total = self._max_flow_compiled(source, sink)
+		else:
+			# Residual adjacency, rebuilt only after arcs or Flows were added
+			# out_adj/in_adj: Node index -> [(neighbor index, arc slot)]
+			n = len(self._nodes_by_idx)
+			if self._out_adj is None:
+				out_adj = [[] for _ in range(n)]
+				in_adj = [[] for _ in range(n)]
+				for k, (u, v) in enumerate(zip(self._src, self._dst)):
+					out_adj[u].append((v, k))
+					in_adj[v].append((u, k))
+				self._out_adj, self._in_adj = out_adj, in_adj
+			s, t = self._idx_of[self.Graph[source]], self._idx_of[self.Graph[sink]]
+			if len(self._unset) != n:
+				self._level = [-1] * n
+				self._it = [0] * n
+				self._unset = [-1] * n
+				self._zeros = [0] * n
+			# it:	current-arc position per Node, each arc is tried once per phase
+			it = self._it
+			while self._bfs_levels(s, t):
+				it[:] = self._zeros
+				pushed = self._dfs_blocking(s, t, it)
+				while pushed > 0:
+					total += pushed
+					pushed = self._dfs_blocking(s, t, it)
+		return total
+
+	# BFS from s over residual arcs (Node indices)
+	# level[idx]: distance from s, -1 while unvisited, so it doubles as the visited flags
+	# Forward residual: capacity left on u->v, backward residual: flow on p->u
+	# Residuals are read straight from the _cap/_flow slots
+	# Stops as soon as t is labeled, False if t can no longer be reached
+	def _bfs_levels(self, s, t):
+		out_adj, in_adj = self._out_adj, self._in_adj
+		cap, flow = self._cap, self._flow
+		# Reset the shared buffers in place
+		level = self._level
+		level[:] = self._unset
+		level[s] = 0
+		q = self._bfs_queue
+		q.clear()
+		q.append(s)
+		while q:
+			u = q.popleft()
+			next_level = level[u] + 1
+			for v, k in out_adj[u]:
+				if level[v] < 0 and cap[k] > flow[k]:
+					level[v] = next_level
+					# Every level below t's is complete, nothing past it is used
+					if v == t:
+						return True
+					q.append(v)
+			for p, k in in_adj[u]:
+				if level[p] < 0 and flow[k] > 0:
+					level[p] = next_level
+					if p == t:
+						return True
+					q.append(p)
+		return False
+
+	# Find one s->t path along the level graph and push its bottleneck
+	# Candidates for u are its out-arcs, then its in-arcs (reversed),
+	# it[u] skips those already found saturated or dead this phase
+	# Iterative, path holds (Node index, arc slot, forward, residual) per step,
+	# so long level graphs don't hit the recursion limit
+	# Returns the amount pushed, 0 once s is blocked
+	def _dfs_blocking(self, s, t, it):
+		level = self._level
+		cap, flow = self._cap, self._flow
+		out_adj, in_adj = self._out_adj, self._in_adj
+		path = []
+		u = s
+		while u != t:
+			out_arcs, in_arcs = out_adj[u], in_adj[u]
+			n_out = len(out_arcs)
+			n_all = n_out + len(in_arcs)
+			while it[u] < n_all:
+				i = it[u]
+				if i < n_out:
+					v, k = out_arcs[i]
+					residual = cap[k] - flow[k]
+				else:
+					v, k = in_arcs[i - n_out]
+					residual = flow[k]
+				if residual > 0 and level[v] == level[u] + 1:
+					break
+				it[u] += 1
+			else:
+				# Dead end: step back and skip the arc that led here
+				if not path:
+					return 0
+				u = path.pop()[0]
+				it[u] += 1
+				continue
+			path.append((u, k, i < n_out, residual))
+			u = v
+
+		d = min(step[3] for step in path)
+		# Node totals move with the arc, no pass over arcs afterwards
+		nodes, src, dst = self._nodes_by_idx, self._src, self._dst
+		for _, k, forward, _ in path:
+			delta = d if forward else -d
+			flow[k] += delta
+			nodes[src[k]].outflow += delta
+			nodes[dst[k]].inflow += delta
+		return d
+
+	# Flatten the arc arrays into forward-star arrays over Node indices
+	# Arc slot k is edge 2k (u->v, cap) paired with its reverse 2k + 1 (v->u, cap 0),
+	# so the twin of edge e is e ^ 1 and its residual is cap[e] - flow[e]
+	# head[u]:	first edge leaving u, nxt[e]: next edge leaving the same Node, -1 ends
+	# Capacities stay int64 when every capacity is an int, float64 otherwise
+	def _compile(self):
+		n, m = len(self.Graph), 2 * len(self._cap)
+		dtype = np.int64 if all(isinstance(c, int) for c in self._cap) else np.float64
+		head = [-1] * n
+		nxt = [0] * m
+		for k, (u, v) in enumerate(zip(self._src, self._dst)):
+			e = 2 * k
+			nxt[e], head[u] = head[u], e
+			nxt[e + 1], head[v] = head[v], e + 1
+		to = np.empty(m, dtype=np.int32)
+		to[0::2], to[1::2] = self._dst, self._src
+		cap = np.zeros(m, dtype=dtype)
+		cap[0::2] = self._cap
+		return np.array(head, dtype=np.int32), np.array(nxt, dtype=np.int32), to, cap
+
+	# max_flow body for the compiled path, scatters flows back into the arc
+	# arrays and onto the Nodes
+	# The arrays are compiled once and reused until the Network changes
+	def _max_flow_compiled(self, source, sink):
+		if self._csr is None or self._csr_dirty:
+			head, nxt, to, cap = self._compile()
+			flow = np.zeros_like(cap)
+			self._csr = head, nxt, to, cap, flow
+			self._csr_dirty = False
+		else:
+			head, nxt, to, cap, flow = self._csr
+			flow.fill(0)
+		total = _edmonds_karp(head, nxt, to, cap, flow,
+			self._idx_of[self.Graph[source]], self._idx_of[self.Graph[sink]])
+		self._flow[:] = flow[0::2].tolist()
+		nodes = self._nodes_by_idx
+		for u, v, f in zip(self._src, self._dst, self._flow):
+			nodes[u].outflow += f
+			nodes[v].inflow += f
+		return total
+
+
+# Edmonds-Karp on forward-star arrays (see Network._compile)
+# BFS with a preallocated parent_edge array and an int32 array queue,
+# then augment the bottleneck along the path; flow is updated in place
+# Returns the net flow out of s
+def _edmonds_karp(head, nxt, to, cap, flow, s, t):
+	n = head.shape[0]
+	parent_edge = np.empty(n, dtype=np.int32)
+	queue = np.empty(n, dtype=np.int32)
+	while True:
+		# -1: unseen, -2: source
+		parent_edge[:] = -1
+		parent_edge[s] = -2
+		q_head, q_tail = 0, 1
+		queue[0] = s
+		while q_head < q_tail and parent_edge[t] == -1:
+			u = queue[q_head]
+			q_head += 1
+			e = head[u]
+			while e != -1:
+				v = to[e]
+				if parent_edge[v] == -1 and cap[e] > flow[e]:
+					parent_edge[v] = e
+					queue[q_tail] = v
+					q_tail += 1
+				e = nxt[e]
+		if parent_edge[t] == -1:
+			break
+
+		# Bottleneck, walking back from t
+		e = parent_edge[t]
+		f = cap[e] - flow[e]
+		v = to[e ^ 1]
+		while v != s:
+			e = parent_edge[v]
+			f = min(f, cap[e] - flow[e])
+			v = to[e ^ 1]
+		# Augment
+		v = t
+		while v != s:
+			e = parent_edge[v]
+			flow[e] += f
+			flow[e ^ 1] -= f
+			v = to[e ^ 1]
+
+	total = 0
+	e = head[s]
+	while e != -1:
+		total += flow[e]
+		e = nxt[e]
+	return total
+
+
+# Compile eagerly for int and float capacities, cached on disk between runs
+if njit is not None:
+	_edmonds_karp = njit([
+		"int64(int32[:], int32[:], int32[:], int64[:], int64[:], int64, int64)",
+		"float64(int32[:], int32[:], int32[:], float64[:], float64[:], int64, int64)",
+	], cache=True)(_edmonds_karp)
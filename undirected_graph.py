@@ -1,6 +1,8 @@
 # Undirected Graph Data Structures
 # Vertices are IDs
 # Edges are most important, hold weighted connections between IDs
+import sys
+from array import array
 from collections import deque
 
 
@@ -31,11 +33,21 @@ class Edge:
 class UndiGraph:
 	def __init__(self, vertex_list, edge_list=None):
 		# key:		dict {"ID": Index}, map Vertex IDs to Matrix index
+		# labels:	list of IDs by Matrix index, inverse of key
 		# size:		number of vertices
 		# Matrix:	Adjacency matrix, plot of edge weights
+		# 			Each row is a contiguous array of unboxed 64-bit ints ('q')
+		# 			while every weight is one, plain lists once any other weight
+		# 			is added (floats, Fractions, None...), which store it as is
+		# _boxed:	True once rows are lists
 		self.key = {name.ID: num for num, name in enumerate(vertex_list)}
+		self.labels = [name.ID for name in vertex_list]
 		self.size = len(vertex_list)
-		self.Matrix = [[0 for col in range(self.size)]for row in range(self.size)]
+		self.Matrix = [array('q', bytes(8 * self.size)) for row in range(self.size)]
+		self._boxed = False
+		# _bits:	edge presence per row as an int bitset (bit j: edge to j),
+		# 			lets bfs test a whole row of neighbors in one operation
+		self._bits = [0] * self.size
 
 		if edge_list:
 			self.add_edges(edge_list)
@@ -44,49 +56,66 @@ class UndiGraph:
 	# Add s->e to Matrix[key[s]][key[e]]
 	# Add e->s to Matrix[key[e]][key[s]]
 	def add_edge(self, e):
-		# s->e
-		self.Matrix[self.key[e.start]][self.key[e.end]] = e.W
-		# e->s
-		self.Matrix[self.key[e.end]][self.key[e.start]] = e.W
-
-	# Takes list of Edges, adds each to Matrix
+		self.add_edges((e,))
+
+	# Test if a weight fits a 'q' row exactly: a plain int within 64 bits
+	# (bools are excluded, a 'q' row would turn True into 1)
+	@staticmethod
+	def _fits_q(w):
+		return type(w) is int and -2**63 <= w < 2**63
+
+	# Switch Matrix rows to lists, keeping existing weights
+	def _box(self):
+		self.Matrix = [list(row) for row in self.Matrix]
+		self._boxed = True
+
+	# Takes list of Edges, adds each to Matrix (add_edge is a batch of one)
+	# Boxes at most once up front and looks up key/Matrix/_bits once
+	# for the whole batch
 	def add_edges(self, edges):
-		for edge in edges:
-			self.add_edge(edge)
+		edges = list(edges)
+		if not self._boxed and not all(self._fits_q(e.W) for e in edges):
+			self._box()
+		key, matrix, bits = self.key, self.Matrix, self._bits
+		for e in edges:
+			s, t, w = key[e.start], key[e.end], e.W
+			# s->e, e->s
+			matrix[s][t] = w
+			matrix[t][s] = w
+			# A weight of 0 means no edge
+			if w:
+				bits[s] |= 1 << t
+				bits[t] |= 1 << s
+			else:
+				bits[s] &= ~(1 << t)
+				bits[t] &= ~(1 << s)
 
 	# Check if something is a vertex in self.key
 	def is_v(self, s):
-		return s in self.key.keys()
+		return s in self.key
 
 	# Takes a number and gives the ID with corresponding index
 	def get_ID(self, s):
-		for k, v in self.key.items():
-			if v == s:
-				return k
+		if isinstance(s, int) and 0 <= s < self.size:
+			return self.labels[s]
 		print("Could not find index...")
 
+	# Builds the whole table first and writes it once
 	def show_matrix(self):
-		print('\n')
-		
 		# Column names
-		for t in self.key.keys():
-			print(f'\t{t}', end='')
-		# Row
-		for k, v in self.key.items():
-			# Column
-			print(f'\n{k}', end='\t')
-			for k2, v2 in self.key.items():
-				print(self.Matrix[v][v2], end='\t')
+		rows = ['\n\n\t' + '\t'.join(self.labels)]
+		# Rows, label then each weight
+		for label, row in zip(self.labels, self.Matrix):
+			rows.append(label + '\t' + '\t'.join(map(str, row)) + '\t')
 
-		print('\n')
+		sys.stdout.write('\n'.join(rows) + '\n\n')
 
 	# Return edge between (start,end) in Matrix
-	# Accepts either string of int
+	# Accepts either string or int, both given the same way
 	def edge_at(self, s, e):
-		# If string IDs, convert and return
-		if isinstance(s, str) and isinstance(e, str):
-			return self.Matrix[self.key[s]][self.key[e]]
-		# Otherwise, if num, simply return
+		# One type check: string IDs convert to indices, ints already are
+		if isinstance(s, str):
+			s, e = self.key[s], self.key[e]
 		return self.Matrix[s][e]
 
 	# Breadth-first search from given source (int or str)
@@ -105,23 +134,24 @@ class UndiGraph:
 			root = source
 
 		# Data structures
-		# Visited list with len() of matrix, initialize all to False
-		visited = [False]*self.size
-		# Depth queue
-		q = deque()
-		q.appendleft(root)
+		# Visited bitset, same layout as _bits rows
+		visited = 0
+		# Depth queue, FIFO: append right, pop left
+		q = deque([root])
 		# Visit source
-		visited[root] = True
+		visited |= 1 << root
 		# BFS path expansion
 		while q:
 			current = q.popleft()
 			print(f'Current Node: {self.get_ID(current)}')
 			
-			# For every non-visited adj vertex to current
-			for i in range(self.size):
-				if ((self.edge_at(current, i)) and (not visited[i])):
-					q.appendleft(i)
-					visited[i] = True
+			# Every non-visited adj vertex to current, in index order
+			new = self._bits[current] & ~visited
+			visited |= new
+			while new:
+				low = new & -new
+				q.append(low.bit_length() - 1)
+				new ^= low
 
 	# Perform BFS on all vertices
 	def bfs_all(self):
@@ -137,11 +167,12 @@ class UndiGraph:
 		counter = 0
 		# Row
 		for i in range(self.size):
+			row = self.Matrix[i]
 			# Col
 			# Ignore vertices before and including this one
 			for j in range(i+1, self.size):
 				# Get current cell value (index = [i][j])
-				cell = self.edge_at(i, j)
+				cell = row[j]
 				counter+=1
 
 				# Do something if there's an edge